@@ -1,39 +1,59 @@
 """Core chunk segmentation primitives: block parsing, embedding, and boundary scoring."""
 
+import bisect
+import functools
 import hashlib
 import logging
 import math
 import re
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from typing import Callable, Iterable, List, Sequence
 
+import numpy as np
+
 from app.schemas import ChunkMetadata
 
 logger = logging.getLogger(__name__)
 
+_LIST_PATTERN = re.compile(r"^\s*(?:[-*+]|\d+\.)\s+")
+# Anything that could yield a blank line: a blank first/last line, a blank
+# line between two newlines, or any line break other than "\n".
+_BLANK_LINE_PATTERN = re.compile(r"\A[^\S\n]*(?:\n|\Z)|\n(?:[^\S\n]*\n|[^\S\n]+\Z)|[\r\v\f\x1c-\x1e\x85\u2028\u2029]")
+
+# Structural cue flags stored as a bitmask on `ParsedBlock.cues`.
+CUE_HEADING = 1
+CUE_LIST = 2
+CUE_FENCE = 4
+CUE_QUOTE = 8
+CUE_LEADING_BLANK = 16
+
+# First characters of a stripped line that can carry any structural cue.
+_CUE_LEAD_CHARS = frozenset("#-*+0123456789`~>")
+
 
 @dataclass
 class ParsedBlock:
     """
     Represents a contiguous block of text produced by `parse_blocks`.
 
+    Blocks hold offsets only; use `block_text` to read the raw text (including
+    newlines) from the source document.
+
     Attributes:
-        text: Raw text contained in the block (including newlines).
         start_line: 1-based line number where the block starts.
         end_line: 1-based line number where the block ends.
         start_char: 0-based character offset where the block starts.
         end_char: 0-based character offset where the block ends.
-        cues: Structural cues detected for the block (e.g., heading, list).
+        cues: Bitmask of structural cues detected for the block (`CUE_*` flags).
         leading_blank_lines: Count of blank lines preceding the block.
         trailing_blank_lines: Count of blank lines following the block.
     """
 
-    text: str
     start_line: int
     end_line: int
     start_char: int
     end_char: int
-    cues: set[str] = field(default_factory=set)
+    cues: int = 0
     leading_blank_lines: int = 0
     trailing_blank_lines: int = 0
 
@@ -42,17 +62,22 @@ NaturalBreakDetector = Callable[[ParsedBlock, ParsedBlock, float], tuple[float,
 EmbeddingFunction = Callable[[Sequence[str]], Sequence[Sequence[float]]]
 
 
-def _classify_line(line: str) -> set[str]:
-    cues: set[str] = set()
+def block_text(block: ParsedBlock, source: str) -> str:
+    """Return the raw text of `block` from the document it was parsed from."""
+    return source[block.start_char:block.end_char]
+
+
+def _classify_line(line: str) -> int:
+    cues = 0
     stripped = line.strip()
     if stripped.startswith("#"):
-        cues.add("heading")
-    if re.match(r"^\s*[-*+]\s+", stripped) or re.match(r"^\s*\d+\.\s+", stripped):
-        cues.add("list")
+        cues |= CUE_HEADING
+    if _LIST_PATTERN.match(stripped):
+        cues |= CUE_LIST
     if stripped.startswith(("```", "~~~")):
-        cues.add("fence")
+        cues |= CUE_FENCE
     if stripped.startswith(">"):
-        cues.add("quote")
+        cues |= CUE_QUOTE
     return cues
 
 
@@ -61,65 +86,51 @@ def parse_blocks(text: str) -> List[ParsedBlock]:
     Split text into structural blocks using blank lines as separators and
     annotate each block with simple structural cues.
     """
+    if not _BLANK_LINE_PATTERN.search(text):
+        # Fast path: without blank lines the whole text is a single block.
+        lines = text.splitlines()
+        cues = 0
+        for line in map(str.strip, lines):
+            if line[:1] in _CUE_LEAD_CHARS:
+                cues |= _classify_line(line)
+        return [
+            ParsedBlock(
+                start_line=1,
+                end_line=len(lines),
+                start_char=0,
+                end_char=len(text),
+                cues=cues,
+            )
+        ]
+
     lines = text.splitlines(keepends=True)
-    blocks: List[ParsedBlock] = []
+    stripped = list(map(str.strip, lines))
+    num_lines = len(lines)
 
-    buf: List[str] = []
-    cues: set[str] = set()
-    start_line = 0
-    start_char = 0
-    blank_streak = 0
-    char_cursor = 0
-
-    for idx, raw_line in enumerate(lines):
-        line_start = char_cursor
-        char_cursor += len(raw_line)
-
-        if not raw_line.strip():
-            blank_streak += 1
-            if buf:
-                block_text = "".join(buf)
-                end_char = line_start
-                end_line = idx
-                blocks.append(
-                    ParsedBlock(
-                        text=block_text,
-                        start_line=start_line + 1,
-                        end_line=end_line + 1,
-                        start_char=start_char,
-                        end_char=end_char,
-                        cues=set(cues),
-                        trailing_blank_lines=blank_streak,
-                    )
-                )
-                buf = []
-                cues = set()
-            continue
-
-        line_cues = _classify_line(raw_line)
-
-        if not buf:
-            start_line = idx
-            start_char = line_start
-            if blank_streak:
-                cues.add("leading_blank")
-            blank_streak = 0
-
-        buf.append(raw_line)
-        cues.update(line_cues)
-
-    if buf:
-        block_text = "".join(buf)
-        end_line = len(lines)
+    # Find runs of non-blank lines with a vectorized scan; only the runs
+    # themselves are walked in Python.
+    offsets = np.zeros(num_lines + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, lines), dtype=np.int64, count=num_lines), out=offsets[1:])
+    has_content = np.fromiter(map(bool, stripped), dtype=np.bool_, count=num_lines)
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], has_content, [False])).astype(np.int8)))
+    char_offsets = offsets.tolist()
+
+    blocks: List[ParsedBlock] = []
+    for run_start, run_end in zip(edges[0::2].tolist(), edges[1::2].tolist()):
+        cues = CUE_LEADING_BLANK if run_start else 0
+        for line in stripped[run_start:run_end]:
+            if line[0] in _CUE_LEAD_CHARS:
+                cues |= _classify_line(line)
+        # A block ends at the blank line that follows it, if any.
+        followed_by_blank = run_end < num_lines
         blocks.append(
             ParsedBlock(
-                text=block_text,
-                start_line=start_line + 1,
-                end_line=end_line,
-                start_char=start_char,
-                end_char=char_cursor,
-                cues=set(cues),
-                trailing_blank_lines=blank_streak,
+                start_line=run_start + 1,
+                end_line=run_end + 1 if followed_by_blank else num_lines,
+                start_char=char_offsets[run_start],
+                end_char=char_offsets[run_end],
+                cues=cues,
+                trailing_blank_lines=1 if followed_by_blank else 0,
             )
         )
 
@@ -127,34 +138,55 @@ def parse_blocks(text: str) -> List[ParsedBlock]:
 
 
 def _cosine_similarity(vec_a: Sequence[float], vec_b: Sequence[float]) -> float:
-    if vec_a is None or vec_b is None:
-        return 0.0
-
-    try:
-        seq_a = list(vec_a)
-        seq_b = list(vec_b)
-    except TypeError:
-        return 0.0
-
-    if len(seq_a) == 0 or len(seq_b) == 0:
+    # Inputs come from `embed_blocks`, which always returns plain lists.
+    if not vec_a or not vec_b:
         return 0.0
-    dot = sum(a * b for a, b in zip(seq_a, seq_b))
-    norm_a = math.sqrt(sum(a * a for a in seq_a))
-    norm_b = math.sqrt(sum(b * b for b in seq_b))
+    dot = sum(a * b for a, b in zip(vec_a, vec_b))
+    norm_a = math.sqrt(sum(a * a for a in vec_a))
+    norm_b = math.sqrt(sum(b * b for b in vec_b))
     denom = norm_a * norm_b
     if denom == 0:
         return 0.0
     return float(dot / denom)
 
 
-def embed_blocks(blocks: Iterable[ParsedBlock], embed_fn: EmbeddingFunction | None) -> List[List[float]]:
+def _adjacent_similarities(embeddings: Sequence[Sequence[float]], num_blocks: int) -> List[float]:
+    """
+    Cosine similarity between each block embedding and its successor.
+
+    Uses a single NumPy pass when every block has an embedding of the same
+    non-zero dimension, otherwise falls back to pairwise comparison.
+    """
+    num_pairs = num_blocks - 1
+    if num_pairs <= 0:
+        return []
+
+    dims = {len(vec) for vec in embeddings}
+    if len(embeddings) == num_blocks and len(dims) == 1 and 0 not in dims:
+        matrix = np.asarray(embeddings, dtype=np.float64)
+        dots = np.einsum("ij,ij->i", matrix[:-1], matrix[1:])
+        norms = np.linalg.norm(matrix, axis=1)
+        denom = norms[:-1] * norms[1:]
+        sims = np.divide(dots, denom, out=np.zeros(num_pairs), where=denom != 0)
+        return sims.tolist()
+
+    num_embeddings = len(embeddings)
+    return [
+        _cosine_similarity(embeddings[i], embeddings[i + 1]) if i + 1 < num_embeddings else 0.0
+        for i in range(num_pairs)
+    ]
+
+
+def embed_blocks(
+    blocks: Iterable[ParsedBlock], source: str, embed_fn: EmbeddingFunction | None
+) -> List[List[float]]:
     """
-    Embed each parsed block with a pluggable embedding function.
+    Embed each parsed block of `source` with a pluggable embedding function.
 
     Returns plain Python lists for predictable downstream use even if the
     embedding function returns numpy arrays.
     """
-    texts = [b.text for b in blocks]
+    texts = [block_text(b, source) for b in blocks]
     if not texts:
         return []
     if embed_fn is None:
@@ -171,19 +203,19 @@ def default_boundary_score(left: ParsedBlock, right: ParsedBlock, similarity: fl
     reasons: List[str] = []
     structural_score = 0.0
 
-    if "heading" in right.cues:
+    if right.cues & CUE_HEADING:
         structural_score += 0.4
         reasons.append("heading start")
-    if left.trailing_blank_lines or "leading_blank" in right.cues:
+    if left.trailing_blank_lines or right.cues & CUE_LEADING_BLANK:
         structural_score += 0.15
         reasons.append("blank line gap")
-    if "fence" in left.cues or "fence" in right.cues:
+    if (left.cues | right.cues) & CUE_FENCE:
         structural_score += 0.25
         reasons.append("code/quote fence")
-    if ("list" in left.cues) != ("list" in right.cues):
+    if (left.cues ^ right.cues) & CUE_LIST:
         structural_score += 0.2
         reasons.append("list boundary")
-    if ("quote" in left.cues) != ("quote" in right.cues):
+    if (left.cues ^ right.cues) & CUE_QUOTE:
         structural_score += 0.15
         reasons.append("quote boundary")
 
@@ -197,47 +229,39 @@ def default_boundary_score(left: ParsedBlock, right: ParsedBlock, similarity: fl
     return combined, reasons
 
 
+def _default_boundary_scores(blocks: Sequence[ParsedBlock], similarities: Sequence[float]) -> List[float]:
+    """
+    Vectorized equivalent of `default_boundary_score` over every adjacent
+    block pair, returning scores only; reasons are derived lazily per split.
+    """
+    if len(blocks) < 2:
+        return []
+
+    cues = np.array([b.cues for b in blocks], dtype=np.uint8)
+    trail_blank = np.array([b.trailing_blank_lines for b in blocks], dtype=np.int32)
+    left, right = cues[:-1], cues[1:]
+    changed = left ^ right
+
+    structural = (
+        0.4 * ((right & CUE_HEADING) != 0)
+        + 0.15 * ((trail_blank[:-1] > 0) | ((right & CUE_LEADING_BLANK) != 0))
+        + 0.25 * (((left | right) & CUE_FENCE) != 0)
+        + 0.2 * ((changed & CUE_LIST) != 0)
+        + 0.15 * ((changed & CUE_QUOTE) != 0)
+    )
+    structural = np.minimum(structural, 1.0)
+
+    semantic_drop = np.maximum(0.0, 1.0 - np.asarray(similarities, dtype=np.float64))
+    combined = np.minimum(1.0, 0.6 * semantic_drop + 0.4 * structural)
+    return combined.tolist()
+
+
 def hash_chunk_id(doc_id: str, start_char: int, end_char: int) -> str:
     """Create a deterministic chunk identifier from document and offsets."""
     payload = f"{doc_id}:{start_char}:{end_char}".encode("utf-8")
     return hashlib.sha1(payload).hexdigest()
 
 
-def _make_chunk(
-    doc_id: str,
-    text: str,
-    start_block: ParsedBlock,
-    end_block: ParsedBlock,
-    start_char: int,
-    end_char: int,
-    boundary_reasons: List[str],
-    confidence: float,
-    overlap: int,
-    chunk_kind: str = "chapter_text",
-    parent_chunk_id: str | None = None,
-) -> ChunkMetadata:
-    chunk_text = text[start_char:end_char]
-    length_chars = len(chunk_text)
-    length_lines = end_block.end_line - start_block.start_line + 1
-    chunk_id = hash_chunk_id(doc_id, start_char, end_char)
-    return ChunkMetadata(
-        doc_id=doc_id,
-        chunk_id=chunk_id,
-        text=chunk_text,
-        start_char=start_char,
-        end_char=end_char,
-        start_line=start_block.start_line,
-        end_line=end_block.end_line,
-        length_chars=length_chars,
-        length_lines=length_lines,
-        boundary_reasons=boundary_reasons,
-        confidence=round(confidence, 3),
-        overlap=overlap,
-        chunk_kind=chunk_kind,
-        parent_chunk_id=parent_chunk_id,
-    )
-
-
 def chunk_document(
     doc_id: str,
     text: str,
@@ -277,44 +301,49 @@ def chunk_document(
 
     boundary_fn = break_detector or default_boundary_score
 
-    embeddings = embed_blocks(blocks, embed_fn)
-    boundary_scores: List[tuple[float, List[str]]] = []
-
-    num_embeddings = len(embeddings)
+    embeddings = embed_blocks(blocks, text, embed_fn)
+    similarities = _adjacent_similarities(embeddings, len(blocks))
 
-    for i in range(len(blocks) - 1):
-        sim = _cosine_similarity(embeddings[i], embeddings[i + 1]) if i + 1 < num_embeddings else 0.0
-        score, reasons = boundary_fn(blocks[i], blocks[i + 1], sim)
-        boundary_scores.append((score, reasons))
+    # The default detector is scored in one vectorized pass; its reasons are
+    # only materialized for boundaries where a split actually happens.
+    boundary_reasons: List[List[str]] | None = None
+    if boundary_fn is default_boundary_score:
+        boundary_scores = _default_boundary_scores(blocks, similarities)
+    else:
+        scored = [boundary_fn(blocks[i], blocks[i + 1], similarities[i]) for i in range(len(blocks) - 1)]
+        boundary_scores = [score for score, _ in scored]
+        # Custom detectors are not trusted to return model-ready values; see below.
+        boundary_reasons = [[str(reason) for reason in reasons or []] for _, reasons in scored]
 
     min_chars = max(1, min_chars)
     target_chars = max(min_chars, target_chars)
     max_chars = max(target_chars, max_chars)
     overlap = max(0, overlap)
 
-    chunks: List[ChunkMetadata] = []
+    # Boundaries are collected as parallel lists during the scan; chunks are
+    # built in one pass afterwards.
+    end_chars = [b.end_char for b in blocks]
+    first_blocks: List[int] = []
+    last_blocks: List[int] = []
+    chunk_starts: List[int] = []
+    chunk_ends: List[int] = []
+    chunk_reasons: List[List[str]] = []
+    chunk_confidences: List[float] = []
     start_idx = 0
     start_char = blocks[0].start_char
 
     i = 0
     while i < len(blocks):
         if i == len(blocks) - 1:
-            chunk = _make_chunk(
-                doc_id,
-                text,
-                blocks[start_idx],
-                blocks[i],
-                start_char,
-                blocks[i].end_char,
-                boundary_reasons=["document end"],
-                confidence=1.0,
-                overlap=overlap,
-                chunk_kind=chunk_kind,
-            )
-            chunks.append(chunk)
+            first_blocks.append(start_idx)
+            last_blocks.append(i)
+            chunk_starts.append(start_char)
+            chunk_ends.append(blocks[i].end_char)
+            chunk_reasons.append(["document end"])
+            chunk_confidences.append(1.0)
             break
 
-        score, reasons = boundary_scores[i]
+        score = boundary_scores[i]
         projected_end = blocks[i].end_char
         current_length = projected_end - start_char
         next_length = blocks[i + 1].end_char - start_char
@@ -323,25 +352,21 @@ def chunk_document(
         can_split = must_split or (current_length >= min_chars and (current_length >= target_chars or score >= 0.55))
 
         if can_split:
-            chunk = _make_chunk(
-                doc_id,
-                text,
-                blocks[start_idx],
-                blocks[i],
-                start_char,
-                projected_end,
-                boundary_reasons=reasons or ["size target"],
-                confidence=max(score, 0.35),
-                overlap=overlap,
-                chunk_kind=chunk_kind,
-            )
-            chunks.append(chunk)
+            if boundary_reasons is not None:
+                reasons = boundary_reasons[i]
+            else:
+                _, reasons = default_boundary_score(blocks[i], blocks[i + 1], similarities[i])
+            first_blocks.append(start_idx)
+            last_blocks.append(i)
+            chunk_starts.append(start_char)
+            chunk_ends.append(projected_end)
+            chunk_reasons.append(reasons or ["size target"])
+            # Clamp to the model's 0..1 range; custom detectors may score outside it.
+            chunk_confidences.append(min(max(score, 0.35), 1.0))
 
             if overlap:
                 next_start_char = max(0, projected_end - overlap)
-                next_start_idx = start_idx
-                while next_start_idx < len(blocks) and blocks[next_start_idx].end_char <= next_start_char:
-                    next_start_idx += 1
+                next_start_idx = bisect.bisect_right(end_chars, next_start_char, lo=start_idx)
                 start_idx = min(next_start_idx, len(blocks) - 1)
                 start_char = max(blocks[start_idx].start_char, next_start_char)
             else:
@@ -349,4 +374,30 @@ def chunk_document(
                 start_char = blocks[start_idx].start_char
         i += 1
 
+    # Every field is derived internally (custom detector scores are clamped and
+    # reasons coerced to strings above), so chunks skip Pydantic validation.
+    build_chunk = functools.partial(
+        ChunkMetadata.model_construct,
+        doc_id=doc_id,
+        overlap=overlap,
+        chunk_kind=chunk_kind,
+    )
+    chunks = [
+        build_chunk(
+            chunk_id=hash_chunk_id(doc_id, chunk_start, chunk_end),
+            text=text[chunk_start:chunk_end],
+            start_char=chunk_start,
+            end_char=chunk_end,
+            start_line=blocks[first].start_line,
+            end_line=blocks[last].end_line,
+            length_chars=chunk_end - chunk_start,
+            length_lines=blocks[last].end_line - blocks[first].start_line + 1,
+            boundary_reasons=reasons,
+            confidence=round(confidence, 3),
+        )
+        for first, last, chunk_start, chunk_end, reasons, confidence in zip(
+            first_blocks, last_blocks, chunk_starts, chunk_ends, chunk_reasons, chunk_confidences
+        )
+    ]
+
     return chunks
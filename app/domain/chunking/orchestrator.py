@@ -11,9 +11,11 @@ from app.schemas import ChunkDetectionRequest, ChunkMetadata
 
 logger = logging.getLogger(__name__)
 
+_SLUG_PATTERN = re.compile(r"[^a-z0-9._-]+")
+
 
 def _slugify(value: str) -> str:
-    cleaned = re.sub(r"[^a-z0-9._-]+", "-", value.strip().lower())
+    cleaned = _SLUG_PATTERN.sub("-", value.strip().lower())
     cleaned = cleaned.strip("-._")
     return cleaned or "doc"
 
@@ -72,11 +74,17 @@ def detect_or_reuse_chunks(
                 filename=filename,
                 url=url,
             )
-            existing = get_chunks(doc_id) or {
-                "chunks": existing["chunks"],
+            # Mirror what store_chunks persisted instead of re-reading the store.
+            existing = {
+                **existing,
+                "chunks": [
+                    c.model_copy(update={"version": version, "finalized": finalized}) for c in existing["chunks"]
+                ],
                 "version": version,
                 "finalized": finalized,
                 "text": text,
+                "filename": filename if filename is not None else existing.get("filename"),
+                "url": url if url is not None else existing.get("url"),
             }
         return {
             "chunks": existing.get("chunks") or [],
@@ -125,9 +133,9 @@ def annotate_chunks(
         ids.append(chunk.chunk_id)
         documents.append(chunk.text)
         resolved_chunk_kind = chunk.chunk_kind or chunk_kind
-        meta = dict(base_metadata)
-        meta.update(
+        metadatas.append(
             {
+                **base_metadata,
                 "doc_id": chunk.doc_id,
                 "chunk_kind": resolved_chunk_kind,
                 "start_line": chunk.start_line,
@@ -148,6 +156,5 @@ def annotate_chunks(
                 "is_meta_chunk": chunk.is_meta_chunk,
             }
         )
-        metadatas.append(meta)
 
     return {"ids": ids, "documents": documents, "metadatas": metadatas}
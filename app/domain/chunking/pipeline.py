@@ -1,28 +1,44 @@
 """Chunk detection pipeline with optional OpenAI-driven enrichment."""
 
-import importlib
+import functools
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
 from app.domain.chunking.core import chunk_document, default_boundary_score, hash_chunk_id
 from app.domain.collections import embedding_function
 from app.schemas import ChunkDetectionRequest, ChunkMetadata
 
+try:
+    from openai import OpenAI
+except ImportError:  # pragma: no cover
+    OpenAI = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Large documents are annotated in parallel batches to avoid one huge, slow request.
+_ENHANCE_BATCH_SIZE = 20
+_ENHANCE_MAX_WORKERS = 4
+
 
+@functools.lru_cache(maxsize=1)
 def _get_openai_client():
-    spec = importlib.util.find_spec("openai")
-    if spec is None:
+    if OpenAI is None:
         logger.warning("Chunk enhancer: openai package not installed; skipping enrichment")
         return None
-    openai_mod = importlib.import_module("openai")
-    return openai_mod.OpenAI()
+    return OpenAI()
 
 
-def _build_enhancement_messages(doc_id: str, text: str, chunks: List[ChunkMetadata]) -> list[dict[str, str]]:
+def _build_enhancement_messages(
+    doc_id: str, text: str, chunks: List[ChunkMetadata], include_summary: bool = True
+) -> list[dict[str, str]]:
     condensed_chunks = []
     for ch in chunks:
         condensed_chunks.append(
@@ -33,26 +49,50 @@ def _build_enhancement_messages(doc_id: str, text: str, chunks: List[ChunkMetada
                 "text": ch.text[:1200],
             }
         )
-    system = (
-        "You enhance chunked document segments with structured annotations.\n"
-        "Return JSON with keys: chunks (list) and document_summary (object).\n"
+    chunk_rules = (
         "Each item in chunks must include chunk_id (string), summary_title (short title), "
         "tags (list of short labels), and thing_type (string describing primary entity type or 'other').\n"
-        "document_summary must include title (short heading), summary (2-4 sentences), and tags (list).\n"
-        "Keep responses concise, avoid markdown, and do not invent chunk IDs."
     )
+    if include_summary:
+        system = (
+            "You enhance chunked document segments with structured annotations.\n"
+            "Return JSON with keys: chunks (list) and document_summary (object).\n"
+            + chunk_rules
+            + "document_summary must include title (short heading), summary (2-4 sentences), and tags (list).\n"
+            "Keep responses concise, avoid markdown, and do not invent chunk IDs."
+        )
+        payload = {"doc_id": doc_id, "document_preview": text[:2000], "chunks": condensed_chunks}
+    else:
+        system = (
+            "You enhance chunked document segments with structured annotations.\n"
+            "Return JSON with key: chunks (list).\n"
+            + chunk_rules
+            + "Keep responses concise, avoid markdown, and do not invent chunk IDs."
+        )
+        payload = {"doc_id": doc_id, "chunks": condensed_chunks}
+    if orjson is not None:
+        content = orjson.dumps(payload).decode("utf-8")
+    else:
+        content = json.dumps(payload, ensure_ascii=False)
     return [
         {"role": "system", "content": system},
-        {
-            "role": "user",
-            "content": json.dumps(
-                {"doc_id": doc_id, "document_preview": text[:2000], "chunks": condensed_chunks},
-                ensure_ascii=False,
-            ),
-        },
+        {"role": "user", "content": content},
     ]
 
 
+def _request_enhancement(
+    client, doc_id: str, text: str, chunks: List[ChunkMetadata], include_summary: bool = True
+) -> Dict[str, Any]:
+    resp = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=_build_enhancement_messages(doc_id, text, chunks, include_summary),
+        temperature=0.2,
+        response_format={"type": "json_object"},
+    )
+    content = resp.choices[0].message.content or "{}"
+    return json.loads(content)
+
+
 def _enhance_with_openai(
     doc_id: str, text: str, chunks: List[ChunkMetadata]
 ) -> tuple[Dict[str, Dict[str, Any]], Optional[Dict[str, Any]]]:
@@ -63,38 +103,44 @@ def _enhance_with_openai(
     if client is None:
         return {}, None
 
+    batches = [chunks[i:i + _ENHANCE_BATCH_SIZE] for i in range(0, len(chunks), _ENHANCE_BATCH_SIZE)]
     api_key_present = bool(os.getenv("OPENAI_API_KEY"))
     logger.info(
-        "Chunk enhancer: sending %d chunk(s) to OpenAI (api_key_present=%s)",
+        "Chunk enhancer: sending %d chunk(s) to OpenAI in %d batch(es) (api_key_present=%s)",
         len(chunks),
+        len(batches),
         api_key_present,
     )
 
+    # Only the first batch carries the document preview and asks for the
+    # document summary; the rest annotate their chunks only.
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=_build_enhancement_messages(doc_id, text, chunks),
-            temperature=0.2,
-            response_format={"type": "json_object"},
-        )
-        content = resp.choices[0].message.content or "{}"
-        data = json.loads(content)
+        if len(batches) == 1:
+            results = [_request_enhancement(client, doc_id, text, batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(_ENHANCE_MAX_WORKERS, len(batches))) as executor:
+                results = list(executor.map(
+                    lambda idx_batch: _request_enhancement(client, doc_id, text, idx_batch[1], idx_batch[0] == 0),
+                    enumerate(batches),
+                ))
     except Exception:
         logger.exception("Chunk enhancer: OpenAI request failed; returning base chunks")
         return {}, None
 
     chunk_map: Dict[str, Dict[str, Any]] = {}
-    for item in data.get("chunks") or []:
-        chunk_id = item.get("chunk_id")
-        if not chunk_id:
-            continue
-        chunk_map[chunk_id] = {
-            "summary_title": item.get("summary_title"),
-            "tags": [t for t in (item.get("tags") or []) if t],
-            "thing_type": item.get("thing_type"),
-        }
-
-    doc_summary = data.get("document_summary") if isinstance(data.get("document_summary"), dict) else None
+    doc_summary: Optional[Dict[str, Any]] = None
+    for data in results:
+        for item in data.get("chunks") or []:
+            chunk_id = item.get("chunk_id")
+            if not chunk_id:
+                continue
+            chunk_map[chunk_id] = {
+                "summary_title": item.get("summary_title"),
+                "tags": [t for t in (item.get("tags") or []) if t],
+                "thing_type": item.get("thing_type"),
+            }
+        if doc_summary is None and isinstance(data.get("document_summary"), dict) and data["document_summary"]:
+            doc_summary = data["document_summary"]
     logger.info(
         "Chunk enhancer: received annotations (chunks=%d, has_document_summary=%s)",
         len(chunk_map),
@@ -104,11 +150,12 @@ def _enhance_with_openai(
 
 
 def _make_meta_chunk(doc_id: str, text: str, summary: Dict[str, Any]) -> ChunkMetadata:
-    summary_text = summary.get("summary") or ""
-    summary_title = summary.get("title") or "Document Summary"
-    tags = [t for t in (summary.get("tags") or []) if t]
+    # Coerce LLM-provided fields up front since the model is built without validation.
+    summary_text = str(summary.get("summary") or "")
+    summary_title = str(summary.get("title") or "Document Summary")
+    tags = [str(t) for t in (summary.get("tags") or []) if t]
     chunk_id = f"{hash_chunk_id(doc_id, 0, len(text))}-meta"
-    return ChunkMetadata(
+    return ChunkMetadata.model_construct(
         doc_id=doc_id,
         chunk_id=chunk_id,
         text=summary_text,
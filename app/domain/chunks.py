@@ -1,17 +1,45 @@
-"""Disk-backed persistence for detected chunk sets."""
+"""SQLite-backed persistence for detected chunk sets."""
 
+import contextlib
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime, timezone
-from typing import Dict, Optional, Tuple
+from typing import Iterator, Optional, Tuple
 
 from app.schemas import ChunkMetadata
 
-CHUNK_STORE_PATH = os.getenv("CHUNK_STORE_PATH", "./chunks.json")
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
+CHUNK_DB_PATH = os.getenv("CHUNK_DB_PATH", "./chunks.db")
+# Legacy JSON store; imported into the database once when it is first created.
+CHUNK_STORE_PATH = os.getenv("CHUNK_STORE_PATH", "./chunks.json")
 
-def _default_state() -> Dict[str, dict]:
-    return {"docs": {}}
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_docs (
+    doc_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    finalized INTEGER NOT NULL,
+    text TEXT,
+    chunks BLOB NOT NULL,
+    chunk_count INTEGER NOT NULL,
+    updated_at TEXT,
+    filename TEXT,
+    url TEXT
+)
+"""
+_UPSERT_SQL = (
+    "INSERT OR REPLACE INTO chunk_docs "
+    "(doc_id, version, finalized, text, chunks, chunk_count, updated_at, filename, url) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_db_ready = False
+_db_lock = threading.Lock()
 
 
 def _ensure_parent_dir(path: str) -> None:
@@ -20,22 +48,76 @@ def _ensure_parent_dir(path: str) -> None:
         os.makedirs(parent, exist_ok=True)
 
 
-def load_chunk_store() -> Dict[str, dict]:
-    """Load chunk state from disk, defaulting to an empty structure when missing or invalid."""
+def _dump_chunks(chunks: list[dict]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(chunks)
+    return json.dumps(chunks, ensure_ascii=False).encode("utf-8")
+
+
+def _load_chunks(raw: bytes) -> list[dict]:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _import_legacy_store(conn: sqlite3.Connection) -> None:
     if not os.path.exists(CHUNK_STORE_PATH):
-        return _default_state()
+        return
     try:
         with open(CHUNK_STORE_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError):
-        return _default_state()
-
-
-def save_chunk_store(data: Dict[str, dict]) -> None:
-    """Persist chunk state to disk, creating directories when necessary."""
-    _ensure_parent_dir(CHUNK_STORE_PATH)
-    with open(CHUNK_STORE_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+            docs = json.load(f).get("docs", {})
+    except (json.JSONDecodeError, OSError, AttributeError):
+        return
+    for doc_id, doc in docs.items():
+        chunks = doc.get("chunks") or []
+        conn.execute(
+            _UPSERT_SQL,
+            (
+                doc_id,
+                int(doc.get("version", 1)),
+                int(bool(doc.get("finalized", False))),
+                doc.get("text"),
+                _dump_chunks(chunks),
+                len(chunks),
+                doc.get("updated_at"),
+                doc.get("filename"),
+                doc.get("url"),
+            ),
+        )
+
+
+def _init_db() -> None:
+    global _db_ready
+    with _db_lock:
+        if _db_ready:
+            return
+        _ensure_parent_dir(CHUNK_DB_PATH)
+        conn = sqlite3.connect(CHUNK_DB_PATH, timeout=30, isolation_level=None)
+        try:
+            # WAL lets readers in other workers proceed while one writer commits.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunk_docs'"
+            ).fetchone()
+            if not exists:
+                conn.execute(_SCHEMA)
+                _import_legacy_store(conn)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        _db_ready = True
+
+
+@contextlib.contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    _init_db()
+    conn = sqlite3.connect(CHUNK_DB_PATH, timeout=30, isolation_level=None)
+    try:
+        conn.execute("PRAGMA synchronous=NORMAL")
+        yield conn
+    finally:
+        conn.close()
 
 
 def store_chunks(
@@ -47,59 +129,81 @@ def store_chunks(
     url: Optional[str] = None,
 ) -> Tuple[int, bool]:
     """Persist a set of chunks for a document and bump the stored version counter."""
-    data = load_chunk_store()
-    docs = data.setdefault("docs", {})
-    existing = docs.get(doc_id, {})
-    version = int(existing.get("version", 0)) + 1
-    stored_chunks = [c.model_copy(update={"version": version, "finalized": finalized}) for c in chunks]
-    docs[doc_id] = {
-        "version": version,
-        "finalized": finalized,
-        "text": text if text is not None else existing.get("text"),
-        "chunks": [c.model_dump(mode="json") for c in stored_chunks],
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-        "filename": filename if filename is not None else existing.get("filename"),
-        "url": url if url is not None else existing.get("url"),
-    }
-    save_chunk_store(data)
+    with _connect() as conn:
+        # Take the write lock before reading the version so concurrent workers
+        # cannot hand out the same version number.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existing = conn.execute(
+                "SELECT version, text, filename, url FROM chunk_docs WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+            prev_version, prev_text, prev_filename, prev_url = existing or (0, None, None, None)
+            version = int(prev_version) + 1
+            stored_chunks = [
+                c.model_copy(update={"version": version, "finalized": finalized}).model_dump(mode="json")
+                for c in chunks
+            ]
+            conn.execute(
+                _UPSERT_SQL,
+                (
+                    doc_id,
+                    version,
+                    int(finalized),
+                    text if text is not None else prev_text,
+                    _dump_chunks(stored_chunks),
+                    len(stored_chunks),
+                    datetime.now(timezone.utc).isoformat(),
+                    filename if filename is not None else prev_filename,
+                    url if url is not None else prev_url,
+                ),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
     return version, finalized
 
 
 def get_chunks(doc_id: str) -> Optional[dict]:
     """Retrieve stored chunk metadata for a document, or None if absent."""
-    data = load_chunk_store()
-    doc = data.get("docs", {}).get(doc_id)
-    if not doc:
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT version, finalized, text, updated_at, filename, url, chunks FROM chunk_docs WHERE doc_id = ?",
+            (doc_id,),
+        ).fetchone()
+    if not row:
         return None
+    version, finalized, text, updated_at, filename, url, raw_chunks = row
     return {
         "doc_id": doc_id,
-        "version": int(doc.get("version", 1)),
-        "finalized": bool(doc.get("finalized", False)),
-        "text": doc.get("text"),
-        "updated_at": doc.get("updated_at"),
-        "filename": doc.get("filename"),
-        "url": doc.get("url"),
-        "chunks": [ChunkMetadata.model_validate(c) for c in doc.get("chunks", [])],
+        "version": int(version),
+        "finalized": bool(finalized),
+        "text": text,
+        "updated_at": updated_at,
+        "filename": filename,
+        "url": url,
+        "chunks": [ChunkMetadata.model_validate(c) for c in _load_chunks(raw_chunks)],
     }
 
 
 def list_docs(limit: int = 100) -> list[dict]:
     """Return a summary list of stored documents ordered by most recent update."""
-    data = load_chunk_store()
-    docs = data.get("docs", {})
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT doc_id, version, finalized, chunk_count, length(COALESCE(text, '')), updated_at, filename, url "
+            "FROM chunk_docs ORDER BY updated_at DESC LIMIT ?",
+            (max(1, limit),),
+        ).fetchall()
     items: list[dict] = []
-    for doc_id, payload in docs.items():
-        chunks = payload.get("chunks") or []
-        text = payload.get("text") or ""
+    for doc_id, version, finalized, chunk_count, text_length, updated_at, filename, url in rows:
         items.append({
             "doc_id": doc_id,
-            "version": int(payload.get("version", 1)),
-            "finalized": bool(payload.get("finalized", False)),
-            "chunk_count": len(chunks),
-            "text_length": len(text),
-            "updated_at": payload.get("updated_at"),
-            "filename": payload.get("filename"),
-            "url": payload.get("url"),
+            "version": int(version),
+            "finalized": bool(finalized),
+            "chunk_count": chunk_count,
+            "text_length": text_length,
+            "updated_at": updated_at,
+            "filename": filename,
+            "url": url,
         })
-    items.sort(key=lambda x: x.get("updated_at") or "", reverse=True)
-    return items[:max(1, limit)]
+    return items
@@ -1,8 +1,11 @@
 """Chroma collection utilities and metadata sanitization helpers."""
 
 import json
+import logging
 import os
+import queue
 import re
+import threading
 from typing import Any, Dict, List
 
 import chromadb
@@ -10,11 +13,28 @@ from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunct
 
 CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_db")
 EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+# Large single upserts stall while Chroma grows the HNSW graph; write in slices instead.
+CHROMA_UPSERT_BATCH = int(os.getenv("CHROMA_UPSERT_BATCH", "200"))
 
 _client = chromadb.PersistentClient(path=CHROMA_PATH)
 _embed_fn = SentenceTransformerEmbeddingFunction(model_name=EMBED_MODEL)
 _NAME_PATTERN = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9._-]{1,510}[A-Za-z0-9])?$")
+_NAME_INVALID_PATTERN = re.compile(r"[^a-z0-9._-]+")
 _ALLOWED_META_TYPES = (str, int, float, bool, bytes, bytearray, type(None))
+# Ingestion hands its Chroma writes to one background thread, which coalesces
+# queued requests (up to this many records) before writing.
+_UPSERT_QUEUE_SIZE = 1024
+_UPSERT_COALESCE_RECORDS = 500
+_upsert_queue: "queue.Queue[tuple[str, int, List[str], List[str], List[Dict[str, Any]]]]" = queue.Queue(_UPSERT_QUEUE_SIZE)
+_upsert_thread: threading.Thread | None = None
+_upsert_thread_lock = threading.Lock()
+# Bumped by delete_collection; queued writes from an older generation are
+# dropped so they cannot recreate a deleted collection with stale records.
+# The lock also keeps a delete from interleaving with an in-progress write.
+_collection_generations: Dict[str, int] = {}
+_collection_write_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
 
 def client() -> chromadb.ClientAPI:
     """Return the shared Chroma client instance."""
@@ -33,7 +53,7 @@ def normalize_collection_name(raw: str) -> str:
     if not name:
         raise ValueError("Collection name cannot be empty.")
     name = name.lower().replace(" ", "_")
-    name = re.sub(r"[^a-z0-9._-]+", "_", name)
+    name = _NAME_INVALID_PATTERN.sub("_", name)
     name = name.strip("._-")
     if len(name) < 3 or len(name) > 512 or not _NAME_PATTERN.match(name):
         raise ValueError("Collection name must be 3-512 chars of a-z, 0-9, . _ -, start/end alphanumeric.")
@@ -42,13 +62,151 @@ def normalize_collection_name(raw: str) -> str:
 def get_collection(name: str):
     """Fetch or create a Chroma collection with the configured embedding function."""
     safe = normalize_collection_name(name)
-    # Chroma collections need the embedding_function supplied at access time
+    # Chroma collections need the embedding_function supplied at access time.
+    # Handles are not cached: another process may delete or recreate the
+    # collection, and get_or_create always returns a live one.
     return _client.get_or_create_collection(
         name=safe,
         embedding_function=_embed_fn,
         metadata={"hnsw:space": "cosine"},
     )
 
+def delete_collection(name: str) -> None:
+    """
+    Delete a Chroma collection by (already normalized) name. Background writes
+    queued for it before the delete are discarded rather than applied.
+    """
+    with _collection_write_lock:
+        _collection_generations[name] = _collection_generations.get(name, 0) + 1
+        _client.delete_collection(name=name)
+
+def chunked_upsert(
+    col,
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[Dict[str, Any]] | None = None,
+    batch_size: int | None = None,
+) -> int:
+    """
+    Upsert records into a collection in slices of `batch_size` (default
+    `CHROMA_UPSERT_BATCH`) and return the number of records written.
+    """
+    size = max(1, batch_size or CHROMA_UPSERT_BATCH)
+    for start in range(0, len(ids), size):
+        end = start + size
+        col.upsert(
+            ids=ids[start:end],
+            documents=documents[start:end],
+            metadatas=metadatas[start:end] if metadatas is not None else None,
+        )
+    return len(ids)
+
+def _comparable_metadata(meta: Dict[str, Any] | None) -> Dict[str, Any]:
+    return {k: v for k, v in (meta or {}).items() if v is not None}
+
+def upsert_changed(
+    col,
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[Dict[str, Any]],
+) -> int:
+    """
+    Upsert only the records whose document or metadata differ from what the
+    collection already holds, so re-ingesting unchanged chunks skips both
+    re-embedding and the index write. Returns the number of records written.
+    """
+    if not ids:
+        return 0
+    stored = col.get(ids=ids, include=["documents", "metadatas"])
+    current = {
+        rid: (doc, _comparable_metadata(meta))
+        for rid, doc, meta in zip(stored.get("ids") or [], stored.get("documents") or [], stored.get("metadatas") or [])
+    }
+    changed = [
+        i for i, rid in enumerate(ids)
+        if current.get(rid) != (documents[i], _comparable_metadata(metadatas[i]))
+    ]
+    if not changed:
+        return 0
+    return chunked_upsert(
+        col,
+        [ids[i] for i in changed],
+        [documents[i] for i in changed],
+        [metadatas[i] for i in changed],
+    )
+
+def _write_queued(batch: List[tuple[str, int, List[str], List[str], List[Dict[str, Any]]]]) -> None:
+    # Merge requests per collection generation; a later write to the same id
+    # wins, and Chroma rejects duplicate ids within one upsert.
+    merged: Dict[tuple[str, int], Dict[str, tuple[str, Dict[str, Any]]]] = {}
+    for name, generation, ids, documents, metadatas in batch:
+        records = merged.setdefault((name, generation), {})
+        for rid, doc, meta in zip(ids, documents, metadatas):
+            records.pop(rid, None)
+            records[rid] = (doc, meta)
+    for (name, generation), records in merged.items():
+        with _collection_write_lock:
+            if _collection_generations.get(name, 0) != generation:
+                logger.info(
+                    "Chroma writer: dropped %d record(s) queued for '%s' before it was deleted", len(records), name
+                )
+                continue
+            try:
+                written = upsert_changed(
+                    get_collection(name),
+                    list(records),
+                    [doc for doc, _ in records.values()],
+                    [meta for _, meta in records.values()],
+                )
+                logger.info("Chroma writer: upserted %d of %d queued record(s) into '%s'", written, len(records), name)
+            except Exception:
+                logger.exception("Chroma writer: failed to upsert %d record(s) into '%s'", len(records), name)
+
+def _upsert_worker() -> None:
+    while True:
+        batch = [_upsert_queue.get()]
+        records = len(batch[0][2])
+        while records < _UPSERT_COALESCE_RECORDS:
+            try:
+                item = _upsert_queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            records += len(item[2])
+        try:
+            _write_queued(batch)
+        finally:
+            for _ in batch:
+                _upsert_queue.task_done()
+
+def enqueue_upsert(
+    collection_name: str,
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[Dict[str, Any]],
+) -> int:
+    """
+    Queue records for a background `upsert_changed` into `collection_name` and
+    return immediately with the number of records queued. Blocks only when
+    the queue is full. Records become queryable once the writer thread runs;
+    use `flush_upserts` to wait for that. Records still queued when the
+    collection is deleted through `delete_collection` are dropped.
+    """
+    global _upsert_thread
+    if not ids:
+        return 0
+    with _upsert_thread_lock:
+        if _upsert_thread is None or not _upsert_thread.is_alive():
+            _upsert_thread = threading.Thread(target=_upsert_worker, name="chroma-upsert-writer", daemon=True)
+            _upsert_thread.start()
+    generation = _collection_generations.get(collection_name, 0)
+    _upsert_queue.put((collection_name, generation, ids, documents, metadatas))
+    return len(ids)
+
+def flush_upserts() -> None:
+    """Block until every queued background upsert has been written (or has failed and been logged)."""
+    _upsert_queue.join()
+
 def list_collection_names() -> list[str]:
     """Return sorted collection names for display and validation."""
     cols = _client.list_collections()
@@ -2,10 +2,12 @@
 Document ingestion pipelines that convert raw text into stored data structures.
 """
 
-from .openai_ingest import ingest_lore_from_text
+from .openai_ingest import ingest_lore_from_text, poll_and_finalize, submit_batch_ingest
 from .pipeline import ingest_text
 
 __all__ = [
     "ingest_lore_from_text",
     "ingest_text",
+    "poll_and_finalize",
+    "submit_batch_ingest",
 ]
@@ -0,0 +1,215 @@
+"""Staged upload ingestion: read → OpenAI extraction → storage, connected by bounded queues.
+
+Each stage runs as its own asyncio task so disk reads, OpenAI latency and
+Chroma/library writes for different uploads overlap. The extraction stage
+groups documents from any number of concurrent jobs into batches of up to
+`INGEST_PIPELINE_BATCH_SIZE`, waiting at most `INGEST_PIPELINE_BATCH_WAIT_SECONDS`
+for a batch to fill.
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.domain.ingestion.openai_ingest import close_async_client, extract_lore_from_texts, store_extraction
+from app.upload_store import read_upload_text
+
+logger = logging.getLogger(__name__)
+
+INGEST_PIPELINE_QUEUE_SIZE = int(os.getenv("INGEST_PIPELINE_QUEUE_SIZE", "32"))
+INGEST_PIPELINE_BATCH_SIZE = int(os.getenv("INGEST_PIPELINE_BATCH_SIZE", "8"))
+INGEST_PIPELINE_BATCH_WAIT_SECONDS = float(os.getenv("INGEST_PIPELINE_BATCH_WAIT_SECONDS", "0.5"))
+# Jobs are kept for polling until this many newer jobs exist. Results hold
+# each file's stored chunks, so callers that do not poll should discard theirs.
+_MAX_TRACKED_JOBS = 256
+
+
+@dataclass
+class IngestItem:
+    """One uploaded file moving through the pipeline; `result` is set when it leaves."""
+
+    job: "IngestJob"
+    upload: Dict[str, Any]
+    text: str = ""
+    extraction: Optional[tuple[str, Dict[str, Any]]] = None
+    result: Dict[str, Any] | Exception | None = None
+
+
+@dataclass
+class IngestJob:
+    """A group of uploads submitted together; `done` is set once every item has a result."""
+
+    job_id: str
+    collection: str
+    notes: Optional[str]
+    items: List[IngestItem] = field(default_factory=list)
+    pending: int = 0
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+_jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+_read_queue: Optional[asyncio.Queue] = None
+_tasks: List[asyncio.Task] = []
+
+
+def _finish(item: IngestItem, result: Dict[str, Any] | Exception) -> None:
+    item.result = result
+    # Results are all that callers read; drop the document text early.
+    item.text = ""
+    item.extraction = None
+    item.job.pending -= 1
+    if item.job.pending == 0:
+        item.job.done.set()
+
+
+def _source_for(upload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"filename": upload["filename"], "file_id": upload["file_id"], "url": upload["url"]}
+
+
+async def _read_stage(in_q: asyncio.Queue, out_q: asyncio.Queue) -> None:
+    while True:
+        item = await in_q.get()
+        try:
+            item.text = await asyncio.to_thread(read_upload_text, item.upload)
+        except Exception as exc:
+            logger.exception("Ingest pipeline: failed to read upload file_id=%s", item.upload.get("file_id"))
+            _finish(item, exc)
+            continue
+        if not item.text.strip():
+            _finish(item, ValueError("File is empty or unreadable"))
+            continue
+        await out_q.put(item)
+
+
+async def _extract_batch(batch: List[IngestItem], out_q: asyncio.Queue) -> None:
+    logger.info("Ingest pipeline: extracting batch of %d document(s)", len(batch))
+    outcomes = await extract_lore_from_texts([
+        {"text": item.text, "collection": item.job.collection, "notes": item.job.notes}
+        for item in batch
+    ])
+    for item, outcome in zip(batch, outcomes, strict=True):
+        # gather(return_exceptions=True) also returns CancelledError, which is a
+        # BaseException; report it as this file's failure instead of passing it on.
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, Exception):
+                outcome = RuntimeError(f"OpenAI extraction did not complete: {outcome!r}")
+            _finish(item, outcome)
+            continue
+        item.extraction = outcome
+        await out_q.put(item)
+
+
+async def _extract_stage(in_q: asyncio.Queue, out_q: asyncio.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await in_q.get()]
+        deadline = loop.time() + INGEST_PIPELINE_BATCH_WAIT_SECONDS
+        while len(batch) < INGEST_PIPELINE_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(in_q.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            await _extract_batch(batch, out_q)
+        except Exception as exc:
+            # e.g. the OpenAI client could not be created; fail what is left of
+            # this batch and keep the stage alive.
+            logger.exception("Ingest pipeline: extraction batch failed")
+            for item in batch:
+                if item.result is None and item.extraction is None:
+                    _finish(item, exc)
+
+
+async def _store_stage(in_q: asyncio.Queue) -> None:
+    while True:
+        item = await in_q.get()
+        try:
+            safe_collection, extracted = item.extraction
+            result = await asyncio.to_thread(
+                store_extraction, item.text, safe_collection, extracted, _source_for(item.upload)
+            )
+        except Exception as exc:
+            logger.exception("Ingest pipeline: failed to store extraction for upload file_id=%s", item.upload.get("file_id"))
+            result = exc
+        _finish(item, result)
+
+
+async def start_ingest_pipeline() -> None:
+    """Start the read, extraction and storage stage tasks on the running event loop."""
+    global _read_queue
+    if _tasks:
+        return
+    read_q: asyncio.Queue = asyncio.Queue(INGEST_PIPELINE_QUEUE_SIZE)
+    extract_q: asyncio.Queue = asyncio.Queue(INGEST_PIPELINE_QUEUE_SIZE)
+    store_q: asyncio.Queue = asyncio.Queue(INGEST_PIPELINE_QUEUE_SIZE)
+    _tasks.extend([
+        asyncio.create_task(_read_stage(read_q, extract_q)),
+        asyncio.create_task(_extract_stage(extract_q, store_q)),
+        asyncio.create_task(_store_stage(store_q)),
+    ])
+    _read_queue = read_q
+    logger.info(
+        "Ingest pipeline: started (queue_size=%d, batch_size=%d, batch_wait=%.2fs)",
+        INGEST_PIPELINE_QUEUE_SIZE,
+        INGEST_PIPELINE_BATCH_SIZE,
+        INGEST_PIPELINE_BATCH_WAIT_SECONDS,
+    )
+
+
+async def stop_ingest_pipeline() -> None:
+    """Cancel the stage tasks, close the OpenAI client, and fail any items that had not finished."""
+    global _read_queue
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    _read_queue = None
+    await close_async_client()
+    for job in _jobs.values():
+        for item in job.items:
+            if item.result is None:
+                _finish(item, RuntimeError("Ingest pipeline stopped before this file finished"))
+
+
+async def submit_ingest_job(collection: str, notes: Optional[str], uploads: List[Dict[str, Any]]) -> IngestJob:
+    """
+    Queue saved uploads (records from `save_upload`) for ingestion into `collection`.
+
+    Returns the job immediately after every upload is queued; await `job.done`
+    or poll `get_ingest_job` for results. Queueing waits when the pipeline is
+    full, which applies back-pressure to callers.
+    """
+    await start_ingest_pipeline()
+    job = IngestJob(job_id=os.urandom(16).hex(), collection=collection, notes=notes)
+    job.items = [IngestItem(job=job, upload=upload) for upload in uploads]
+    job.pending = len(job.items)
+    if not job.items:
+        job.done.set()
+
+    _jobs[job.job_id] = job
+    while len(_jobs) > _MAX_TRACKED_JOBS:
+        _jobs.popitem(last=False)
+
+    for item in job.items:
+        await _read_queue.put(item)
+    return job
+
+
+def get_ingest_job(job_id: str) -> Optional[IngestJob]:
+    """
+    Return a recently submitted job by ID, or None when unknown or evicted.
+    Jobs live in this process only; other workers do not see them.
+    """
+    return _jobs.get(job_id)
+
+
+def discard_ingest_job(job_id: str) -> None:
+    """Stop tracking a job (and its per-file results) once its caller has what it needs."""
+    _jobs.pop(job_id, None)
@@ -1,23 +1,41 @@
 """OpenAI-powered ingestion pipeline for extracting lore and chunk drafts."""
 
+import asyncio
 import json
 import logging
 import os
+import threading
+from datetime import datetime, timezone
 from typing import Any, Dict, List
 
-from app.domain.collections import get_collection, normalize_collection_name, sanitize_metadatas
-from app.domain.library import list_connections, list_things, upsert_connection, upsert_thing
+from app.domain.collections import enqueue_upsert, normalize_collection_name, sanitize_metadatas
+from app.domain.library import list_connection_ids, list_thing_ids, upsert_connections_bulk, upsert_things_bulk
 from app.domain.chunking.orchestrator import annotate_chunks, detect_or_reuse_chunks, derive_doc_id
 from app.schemas import Connection, KNOWN_THING_TYPES, Thing
 
 try:
-    from openai import OpenAI
+    from openai import APIConnectionError, AsyncOpenAI, InternalServerError, OpenAI, RateLimitError
 except ImportError as exc:  # pragma: no cover
     raise RuntimeError("openai package is required for ingestion") from exc
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 
 logger = logging.getLogger(__name__)
 ALLOWED_THING_TYPES = set(KNOWN_THING_TYPES)
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_MAX_RETRIES = 3
+OPENAI_BATCH_STORE_PATH = os.getenv("OPENAI_BATCH_STORE_PATH", "./openai_batches.json")
+# Batch statuses after which OpenAI produces no further output.
+_BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+_batch_store_lock = threading.Lock()
+_RETRYABLE_ERRORS = (APIConnectionError, InternalServerError, RateLimitError)
+# One AsyncOpenAI client is shared by every extraction batch so keep-alive
+# connections are reused; `close_async_client` releases it on shutdown.
+_async_client: AsyncOpenAI | None = None
 
 
 def build_prompt(doc_text: str, notes: str | None = None) -> list[dict[str, str]]:
@@ -39,6 +57,15 @@ def build_prompt(doc_text: str, notes: str | None = None) -> list[dict[str, str]
     ]
 
 
+def _completion_params(doc_text: str, notes: str | None) -> Dict[str, Any]:
+    return {
+        "model": "gpt-4o-mini",
+        "messages": build_prompt(doc_text, notes),
+        "temperature": 0.2,
+        "response_format": {"type": "json_object"},
+    }
+
+
 def normalize_thing_type(value: Any) -> str:
     if not value:
         return "other"
@@ -49,7 +76,7 @@ def normalize_thing_type(value: Any) -> str:
     return normalized or "other"
 
 
-def call_openai(doc_text: str, notes: str | None = None) -> Dict[str, Any]:
+def _log_request(doc_text: str, notes: str | None) -> None:
     api_key = os.getenv("OPENAI_API_KEY")
     logger.info(
         "OpenAI ingest: preparing request (model=%s, text_len=%d, notes_len=%d, api_key_present=%s)",
@@ -63,29 +90,116 @@ def call_openai(doc_text: str, notes: str | None = None) -> Dict[str, Any]:
     else:
         logger.warning("OpenAI ingest: OPENAI_API_KEY is not set; request will likely fail")
 
+
+def _parse_content(content: str) -> Dict[str, Any]:
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers see the same errors.
+    data = orjson.loads(content) if orjson is not None else json.loads(content)
+    if not isinstance(data, dict):
+        raise ValueError("Expected JSON object from OpenAI")
+    return data
+
+
+def _parse_response(resp: Any) -> Dict[str, Any]:
+    logger.info("OpenAI ingest: received response with %d choice(s)", len(resp.choices))
+    return _parse_content(resp.choices[0].message.content or "{}")
+
+
+def call_openai(doc_text: str, notes: str | None = None) -> Dict[str, Any]:
+    """Run a blocking extraction request for one document and return the parsed JSON payload."""
+    _log_request(doc_text, notes)
     client = OpenAI()
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=build_prompt(doc_text, notes),
-            temperature=0.2,
-            response_format={"type": "json_object"},
-        )
+        resp = client.chat.completions.create(**_completion_params(doc_text, notes))
     except Exception:
         logger.exception("OpenAI ingest: request to OpenAI failed")
         raise
 
-    logger.info("OpenAI ingest: received response with %d choice(s)", len(resp.choices))
+    return _parse_response(resp)
 
-    content = resp.choices[0].message.content or "{}"
-    data = json.loads(content)
-    if not isinstance(data, dict):
-        raise ValueError("Expected JSON object from OpenAI")
-    return data
+
+async def call_openai_async(
+    client: AsyncOpenAI,
+    semaphore: asyncio.Semaphore,
+    doc_text: str,
+    notes: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Async variant of `call_openai` for concurrent extraction.
+
+    The semaphore caps in-flight requests; rate-limit, connection, and server
+    errors are retried with exponential backoff before being re-raised. The
+    client should be built with `max_retries=0` (see `_get_async_client`) so
+    the SDK does not retry on top of this loop.
+    """
+    _log_request(doc_text, notes)
+    for attempt in range(OPENAI_MAX_RETRIES):
+        try:
+            async with semaphore:
+                resp = await client.chat.completions.create(**_completion_params(doc_text, notes))
+            break
+        except _RETRYABLE_ERRORS:
+            if attempt == OPENAI_MAX_RETRIES - 1:
+                logger.exception("OpenAI ingest: request to OpenAI failed after %d attempt(s)", attempt + 1)
+                raise
+            delay = 2 ** attempt
+            logger.warning("OpenAI ingest: transient OpenAI error; retrying in %ds", delay)
+            # Back off without holding a slot so other documents keep going.
+            await asyncio.sleep(delay)
+        except Exception:
+            logger.exception("OpenAI ingest: request to OpenAI failed")
+            raise
+
+    return _parse_response(resp)
+
+
+# Extracted items whose fields already have the model's shapes skip Pydantic
+# validation; anything else (missing keys, odd types, timestamps) is validated.
+_THING_STR_KEYS = ("thing_id", "thing_type", "name")
+_THING_OPTIONAL_STR_KEYS = ("summary", "description")
+_THING_LIST_KEYS = ("aliases", "tags")
+_THING_FAST_KEYS = frozenset(_THING_STR_KEYS + _THING_OPTIONAL_STR_KEYS + _THING_LIST_KEYS + ("data",))
+_CONNECTION_STR_KEYS = ("edge_id", "src_id", "dst_id", "rel_type")
+_CONNECTION_FAST_KEYS = frozenset(_CONNECTION_STR_KEYS + ("note", "tags"))
+
+
+def _has_trusted_shape(
+    item: Dict[str, Any],
+    allowed_keys: frozenset,
+    str_keys: tuple[str, ...],
+    optional_str_keys: tuple[str, ...] = (),
+    list_keys: tuple[str, ...] = (),
+) -> bool:
+    if not item.keys() <= allowed_keys:
+        return False
+    for key in str_keys:
+        value = item.get(key)
+        if not isinstance(value, str) or not value:
+            return False
+    for key in optional_str_keys:
+        value = item.get(key)
+        if value is not None and not isinstance(value, str):
+            return False
+    for key in list_keys:
+        value = item.get(key, [])
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            return False
+    return isinstance(item.get("data", {}), dict)
+
+
+def _trusted_thing(t: Dict[str, Any]) -> Thing:
+    if _has_trusted_shape(t, _THING_FAST_KEYS, _THING_STR_KEYS, _THING_OPTIONAL_STR_KEYS, _THING_LIST_KEYS):
+        return Thing.model_construct(**t)
+    return Thing.model_validate(t)
+
+
+def _trusted_connection(c: Dict[str, Any]) -> Connection:
+    if _has_trusted_shape(c, _CONNECTION_FAST_KEYS, _CONNECTION_STR_KEYS, ("note",), ("tags",)):
+        return Connection.model_construct(**c)
+    return Connection.model_validate(c)
 
 
 def dedupe_things(things: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    existing_ids = {t.thing_id for t in list_things()}
+    existing_ids = list_thing_ids()
     unique: Dict[str, Dict[str, Any]] = {}
     for t in things or []:
         tid = t.get("thing_id")
@@ -102,7 +216,7 @@ def dedupe_things(things: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
 
 
 def dedupe_connections(conns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    existing_ids = {c.edge_id for c in list_connections()}
+    existing_ids = list_connection_ids()
     unique: Dict[str, Dict[str, Any]] = {}
     for c in conns or []:
         cid = c.get("edge_id")
@@ -125,21 +239,25 @@ def _persist_chunk_draft(
     source: Dict[str, Any] | None,
     collection: str,
 ) -> Dict[str, Any]:
+    source = source or {}
     detection = detect_or_reuse_chunks(
         doc_id=doc_id,
         text=text,
-        filename=(source or {}).get("filename"),
-        url=(source or {}).get("url"),
+        filename=source.get("filename"),
+        url=source.get("url"),
     )
 
     base_meta = {
-        "source_file": source.get("filename") if source else None,
-        "source_url": source.get("url") if source else None,
-        "source_file_id": source.get("file_id") if source else None,
-        "doc_id": doc_id,
-        "collection": collection,
+        k: v
+        for k, v in (
+            ("source_file", source.get("filename")),
+            ("source_url", source.get("url")),
+            ("source_file_id", source.get("file_id")),
+            ("doc_id", doc_id),
+            ("collection", collection),
+        )
+        if v not in (None, "", [], {})
     }
-    base_meta = {k: v for k, v in base_meta.items() if v not in (None, "", [], {})}
 
     annotated = annotate_chunks(
         [c for c in detection["chunks"] if getattr(c, "finalized", False)],
@@ -147,12 +265,7 @@ def _persist_chunk_draft(
         chunk_kind="chapter_text",
     )
 
-    serialized_chunks: List[Dict[str, Any]] = []
-    for ch in detection["chunks"]:
-        data = ch.model_dump(mode="json")
-        merged = dict(base_meta)
-        merged.update(data)
-        serialized_chunks.append(merged)
+    serialized_chunks = [{**base_meta, **ch.model_dump(mode="json")} for ch in detection["chunks"]]
 
     logger.info(
         "OpenAI ingest: chunk draft stored (doc_id=%s, version=%s, finalized=%s, reused=%s, finalized_chunks=%d)",
@@ -171,12 +284,7 @@ def _persist_chunk_draft(
     }
 
 
-def ingest_lore_from_text(
-    text: str,
-    collection: str,
-    notes: str | None = None,
-    source: Dict[str, Any] | None = None,
-) -> Dict[str, Any]:
+def _start_ingest(text: str, collection: str, notes: str | None) -> str:
     if not text or not text.strip():
         raise ValueError("text must be provided")
 
@@ -187,8 +295,20 @@ def ingest_lore_from_text(
         len(text.strip()),
         len(notes or ""),
     )
-    extracted = call_openai(text, notes)
+    return safe_collection
+
 
+def store_extraction(
+    text: str,
+    safe_collection: str,
+    extracted: Dict[str, Any],
+    source: Dict[str, Any] | None,
+) -> Dict[str, Any]:
+    """
+    Store one document's OpenAI extraction: new things/connections go to the
+    library, the chunk draft is persisted, and finalized chunks are queued for
+    a background Chroma upsert. `safe_collection` must already be normalized.
+    """
     logger.info(
         "OpenAI ingest: extraction returned counts (things=%d, connections=%d, chunks=%d)",
         len(extracted.get("things") or []),
@@ -212,35 +332,40 @@ def ingest_lore_from_text(
         sanitized_things.append(copy)
 
     new_things = dedupe_things(sanitized_things)
+    thing_models: List[Thing] = []
     for t in new_things:
         try:
-            upsert_thing(Thing.model_validate(t))
+            thing_models.append(_trusted_thing(t))
         except Exception:
             logger.exception("OpenAI ingest: failed to store thing with id=%s", t.get("thing_id"))
             raise
+    # One library read/write for the whole document instead of one per item.
+    upsert_things_bulk(thing_models)
 
     # Connections
     new_conns = dedupe_connections(extracted.get("connections") or [])
+    conn_models: List[Connection] = []
     for c in new_conns:
         try:
-            upsert_connection(Connection.model_validate(c))
+            conn_models.append(_trusted_connection(c))
         except Exception:
             logger.exception("OpenAI ingest: failed to store connection with id=%s", c.get("edge_id"))
             raise
+    upsert_connections_bulk(conn_models)
 
     chunk_result = _persist_chunk_draft(doc_id=doc_id, text=text, source=source, collection=safe_collection)
     annotated_chunks = chunk_result["annotated"]
 
     if annotated_chunks["ids"]:
-        col = get_collection(safe_collection)
-        col.upsert(
-            ids=annotated_chunks["ids"],
-            documents=annotated_chunks["documents"],
-            metadatas=sanitize_metadatas(annotated_chunks["metadatas"]),
-        )
-        logger.info(
-            "OpenAI ingest: stored %d finalized chunk(s) in collection '%s'", len(annotated_chunks["ids"]), safe_collection
+        # The background writer only re-embeds chunks that changed, so reused
+        # chunk sets that are already indexed cost a single read.
+        queued = enqueue_upsert(
+            safe_collection,
+            annotated_chunks["ids"],
+            annotated_chunks["documents"],
+            sanitize_metadatas(annotated_chunks["metadatas"]),
         )
+        logger.info("OpenAI ingest: queued %d finalized chunk(s) for collection '%s'", queued, safe_collection)
     else:
         logger.info("OpenAI ingest: no finalized chunks to store (pending user edits)")
 
@@ -260,3 +385,218 @@ def ingest_lore_from_text(
             "reused": chunk_result["detection"].get("reused"),
         },
     }
+
+
+def ingest_lore_from_text(
+    text: str,
+    collection: str,
+    notes: str | None = None,
+    source: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """
+    Extract lore from one document with OpenAI, store new things/connections,
+    and persist a chunk draft. Raises ValueError for empty text or invalid
+    collection names.
+    """
+    safe_collection = _start_ingest(text, collection, notes)
+    extracted = call_openai(text, notes)
+    return store_extraction(text, safe_collection, extracted, source)
+
+
+def _get_async_client() -> AsyncOpenAI:
+    global _async_client
+    if _async_client is None:
+        # call_openai_async owns retries so it can back off outside its semaphore.
+        _async_client = AsyncOpenAI(max_retries=0)
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Close the shared AsyncOpenAI client (and its connection pool), if one was created."""
+    global _async_client
+    client, _async_client = _async_client, None
+    if client is not None:
+        await client.close()
+
+
+async def extract_lore_from_texts(docs: List[Dict[str, Any]]) -> List[tuple[str, Dict[str, Any]] | Exception]:
+    """
+    Run OpenAI extraction for many documents concurrently without storing anything.
+
+    Each doc is a dict with `text` and `collection` plus optional `notes`.
+    Concurrency is capped by `OPENAI_MAX_CONCURRENCY`. Returns one entry per
+    doc in input order: `(safe_collection, extracted)` for `store_extraction`,
+    or the exception raised while validating or extracting that doc.
+    """
+    client = _get_async_client()
+    semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+    async def _extract(doc: Dict[str, Any]) -> tuple[str, Dict[str, Any]]:
+        safe_collection = _start_ingest(doc.get("text") or "", doc.get("collection") or "", doc.get("notes"))
+        extracted = await call_openai_async(client, semaphore, doc["text"], doc.get("notes"))
+        return safe_collection, extracted
+
+    return await asyncio.gather(*(_extract(doc) for doc in docs), return_exceptions=True)
+
+
+# ---------------- Batch API ----------------
+
+def _load_batch_store() -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(OPENAI_BATCH_STORE_PATH):
+        return {"batches": {}}
+    try:
+        with open(OPENAI_BATCH_STORE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {"batches": {}}
+
+
+def _save_batch_store(data: Dict[str, Dict[str, Any]]) -> None:
+    parent = os.path.dirname(os.path.abspath(OPENAI_BATCH_STORE_PATH))
+    os.makedirs(parent, exist_ok=True)
+    with open(OPENAI_BATCH_STORE_PATH, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _update_batch_record(batch_id: str, **fields: Any) -> Dict[str, Any]:
+    with _batch_store_lock:
+        data = _load_batch_store()
+        batches = data.setdefault("batches", {})
+        record = {**batches.get(batch_id, {}), **fields}
+        batches[batch_id] = record
+        _save_batch_store(data)
+    return record
+
+
+def _claim_batch(batch_id: str) -> bool:
+    # Mark the batch as being finalized before any storage work so an
+    # overlapping poll does not store (and re-version) every document again.
+    with _batch_store_lock:
+        data = _load_batch_store()
+        record = data.get("batches", {}).get(batch_id) or {}
+        if record.get("finalized") or record.get("finalizing"):
+            return False
+        record["finalizing"] = True
+        data.setdefault("batches", {})[batch_id] = record
+        _save_batch_store(data)
+    return True
+
+
+def submit_batch_ingest(docs: List[Dict[str, Any]]) -> str:
+    """
+    Submit extraction for many documents through the OpenAI Batch API.
+
+    Each doc is a dict with `text` and `collection` plus optional `notes` and
+    `source`, as in `ingest_lore_from_text`. Batch requests cost about half
+    as much as synchronous calls but complete asynchronously (within 24h), so
+    the docs are recorded in the batch store for `poll_and_finalize`.
+
+    Returns the OpenAI batch ID. Raises ValueError for empty input, empty
+    text, or invalid collection names.
+    """
+    if not docs:
+        raise ValueError("at least one document is required")
+
+    pending: Dict[str, Dict[str, Any]] = {}
+    lines: List[str] = []
+    for idx, doc in enumerate(docs):
+        text = doc.get("text") or ""
+        safe_collection = _start_ingest(text, doc.get("collection") or "", doc.get("notes"))
+        custom_id = f"doc-{idx}"
+        pending[custom_id] = {
+            "text": text,
+            "collection": safe_collection,
+            "source": doc.get("source"),
+        }
+        lines.append(json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _completion_params(text, doc.get("notes")),
+        }, ensure_ascii=False))
+
+    client = OpenAI()
+    payload = ("\n".join(lines) + "\n").encode("utf-8")
+    input_file = client.files.create(file=("lore_ingest.jsonl", payload), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+    _update_batch_record(
+        batch.id,
+        docs=pending,
+        finalized=False,
+        submitted_at=datetime.now(timezone.utc).isoformat(),
+    )
+    logger.info("OpenAI ingest: submitted batch %s with %d document(s)", batch.id, len(pending))
+    return batch.id
+
+
+def poll_and_finalize(batch_id: str) -> Dict[str, Any]:
+    """
+    Check a submitted batch and, once OpenAI has finished with it, store its extractions.
+
+    Each successful document output goes through the same
+    dedupe/upsert/chunk-draft path as `ingest_lore_from_text`. Batches that
+    ended `failed`, `expired`, or `cancelled` are finalized too, storing
+    whatever outputs exist and recording an error for the rest. Returns the
+    batch status and, when finalized on this call, per-document results (or
+    errors); a poll that overlaps one already finalizing reports
+    status "finalizing". Raises KeyError for batch IDs not submitted via
+    `submit_batch_ingest`.
+    """
+    record = _load_batch_store().get("batches", {}).get(batch_id)
+    if record is None:
+        raise KeyError(f"Unknown batch: {batch_id}")
+    if record.get("finalized"):
+        return {"batch_id": batch_id, "status": record.get("status", "completed"), "finalized": True, "results": None}
+    if record.get("finalizing"):
+        return {"batch_id": batch_id, "status": "finalizing", "finalized": False, "results": None}
+
+    client = OpenAI()
+    batch = client.batches.retrieve(batch_id)
+    if batch.status not in _BATCH_TERMINAL_STATUSES:
+        return {"batch_id": batch_id, "status": batch.status, "finalized": False, "results": None}
+    if not _claim_batch(batch_id):
+        return {"batch_id": batch_id, "status": "finalizing", "finalized": False, "results": None}
+    if batch.status != "completed":
+        logger.warning("OpenAI ingest: batch %s ended with status %s", batch_id, batch.status)
+
+    try:
+        outputs: Dict[str, Dict[str, Any]] = {}
+        if batch.output_file_id:
+            for line in client.files.content(batch.output_file_id).text.splitlines():
+                if line.strip():
+                    item = json.loads(line)
+                    outputs[item.get("custom_id")] = item
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for custom_id, doc in record["docs"].items():
+            item = outputs.get(custom_id)
+            response = (item or {}).get("response") or {}
+            if not item or item.get("error") or response.get("status_code") != 200:
+                error = (item or {}).get("error") or "no successful output for document"
+                logger.warning("OpenAI ingest: batch %s document %s failed: %s", batch_id, custom_id, error)
+                results[custom_id] = {"error": str(error)}
+                continue
+            try:
+                extracted = _parse_content(response["body"]["choices"][0]["message"]["content"] or "{}")
+                results[custom_id] = store_extraction(doc["text"], doc["collection"], extracted, doc.get("source"))
+            except Exception as exc:
+                logger.exception("OpenAI ingest: failed to store batch %s document %s", batch_id, custom_id)
+                results[custom_id] = {"error": str(exc)}
+    except BaseException:
+        # Release the claim so a later poll can retry.
+        _update_batch_record(batch_id, finalizing=False)
+        raise
+
+    _update_batch_record(
+        batch_id,
+        finalized=True,
+        finalizing=False,
+        status=batch.status,
+        finalized_at=datetime.now(timezone.utc).isoformat(),
+    )
+    return {"batch_id": batch_id, "status": batch.status, "finalized": True, "results": results}
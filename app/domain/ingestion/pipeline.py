@@ -11,15 +11,17 @@ from app.domain.ingestion.openip_client import extract_lore
 from app.schemas import ChunkKind, ChunkMetadata, Connection, SearchChunk, Thing
 
 CHUNK_KIND_OPTIONS = set(get_args(ChunkKind))
+_SLUG_PATTERN = re.compile(r"[^a-z0-9]+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
 
 def _slugify(value: str) -> str:
     value = value.strip().lower()
-    value = re.sub(r"[^a-z0-9]+", ".", value).strip(".")
+    value = _SLUG_PATTERN.sub(".", value).strip(".")
     return value or str(uuid.uuid4())
 
 
 def _normalize_name(value: str) -> str:
-    return re.sub(r"\s+", " ", value.strip().lower())
+    return _WHITESPACE_PATTERN.sub(" ", value.strip().lower())
 
 
 def _existing_lookup(things: List[Thing]) -> Dict[Tuple[str, str], Thing]:
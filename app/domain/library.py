@@ -3,12 +3,18 @@
 import json
 import os
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
+
+from pydantic import TypeAdapter
 
 from app.schemas import Thing, Connection
 
 LIBRARY_PATH = os.getenv("LIBRARY_PATH", "./library.json")
 
+# Validate whole stored collections in one pass instead of per-record model_validate calls.
+_THINGS_ADAPTER = TypeAdapter(List[Thing])
+_CONNECTIONS_ADAPTER = TypeAdapter(List[Connection])
+
 
 def _default_state() -> Dict[str, Dict[str, dict]]:
     return {"things": {}, "connections": {}}
@@ -43,16 +49,31 @@ def save_library(data: Dict[str, Dict[str, dict]]) -> None:
 
 def upsert_thing(thing: Thing) -> Thing:
     """Insert or replace a Thing while preserving original creation timestamps."""
+    return upsert_things_bulk([thing])[0]
+
+
+def upsert_things_bulk(things: List[Thing]) -> List[Thing]:
+    """
+    Insert or replace many Things with a single load and save of the library
+    file, preserving original creation timestamps. Returns the stored Things
+    in input order.
+    """
+    if not things:
+        return []
     data = load_library()
-    existing_raw = data.get("things", {}).get(thing.thing_id)
-    existing = Thing.model_validate(existing_raw) if existing_raw else None
+    stored = data.setdefault("things", {})
+    results: List[Thing] = []
+    for thing in things:
+        existing_raw = stored.get(thing.thing_id)
+        existing = Thing.model_validate(existing_raw) if existing_raw else None
 
-    created_at = existing.created_at if existing else thing.created_at
-    updated = thing.model_copy(update={"created_at": created_at, "updated_at": datetime.now(timezone.utc)})
+        created_at = existing.created_at if existing else thing.created_at
+        updated = thing.model_copy(update={"created_at": created_at, "updated_at": datetime.now(timezone.utc)})
 
-    data.setdefault("things", {})[updated.thing_id] = updated.model_dump(mode="json")
+        stored[updated.thing_id] = updated.model_dump(mode="json")
+        results.append(updated)
     save_library(data)
-    return updated
+    return results
 
 
 def get_thing(thing_id: str) -> Optional[Thing]:
@@ -68,8 +89,7 @@ def list_things(thing_type: Optional[str] = None, tag: Optional[str] = None, q:
     """List Things with optional filtering by type, tag, or simple substring search."""
     data = load_library()
     things: List[Thing] = []
-    for raw in data.get("things", {}).values():
-        t = Thing.model_validate(raw)
+    for t in _THINGS_ADAPTER.validate_python(list(data.get("things", {}).values())):
         if thing_type and t.thing_type != thing_type:
             continue
         if tag and tag not in t.tags:
@@ -82,6 +102,11 @@ def list_things(thing_type: Optional[str] = None, tag: Optional[str] = None, q:
     return things
 
 
+def list_thing_ids() -> Set[str]:
+    """Return the IDs of all stored Things without validating the records."""
+    return set(load_library().get("things", {}))
+
+
 def delete_thing(thing_id: str) -> bool:
     """Delete a Thing by ID, returning True when removed."""
     data = load_library()
@@ -95,16 +120,31 @@ def delete_thing(thing_id: str) -> bool:
 
 def upsert_connection(edge: Connection) -> Connection:
     """Insert or replace a Connection while preserving original creation timestamps."""
+    return upsert_connections_bulk([edge])[0]
+
+
+def upsert_connections_bulk(edges: List[Connection]) -> List[Connection]:
+    """
+    Insert or replace many Connections with a single load and save of the
+    library file, preserving original creation timestamps. Returns the stored
+    Connections in input order.
+    """
+    if not edges:
+        return []
     data = load_library()
-    existing_raw = data.get("connections", {}).get(edge.edge_id)
-    existing = Connection.model_validate(existing_raw) if existing_raw else None
+    stored = data.setdefault("connections", {})
+    results: List[Connection] = []
+    for edge in edges:
+        existing_raw = stored.get(edge.edge_id)
+        existing = Connection.model_validate(existing_raw) if existing_raw else None
 
-    created_at = existing.created_at if existing else edge.created_at
-    updated = edge.model_copy(update={"created_at": created_at, "updated_at": datetime.now(timezone.utc)})
+        created_at = existing.created_at if existing else edge.created_at
+        updated = edge.model_copy(update={"created_at": created_at, "updated_at": datetime.now(timezone.utc)})
 
-    data.setdefault("connections", {})[updated.edge_id] = updated.model_dump(mode="json")
+        stored[updated.edge_id] = updated.model_dump(mode="json")
+        results.append(updated)
     save_library(data)
-    return updated
+    return results
 
 
 def get_connection(edge_id: str) -> Optional[Connection]:
@@ -120,14 +160,18 @@ def list_connections(thing_id: Optional[str] = None) -> List[Connection]:
     """List connections, optionally filtering by a participating Thing ID."""
     data = load_library()
     edges: List[Connection] = []
-    for raw in data.get("connections", {}).values():
-        edge = Connection.model_validate(raw)
+    for edge in _CONNECTIONS_ADAPTER.validate_python(list(data.get("connections", {}).values())):
         if thing_id and thing_id not in (edge.src_id, edge.dst_id):
             continue
         edges.append(edge)
     return edges
 
 
+def list_connection_ids() -> Set[str]:
+    """Return the IDs of all stored Connections without validating the records."""
+    return set(load_library().get("connections", {}))
+
+
 def delete_connection(edge_id: str) -> bool:
     """Delete a Connection by ID, returning True when removed."""
     data = load_library()
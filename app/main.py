@@ -1,22 +1,39 @@
 """FastAPI app wiring for Spellbinder.
 
-This module owns the public ASGI `app` instance and the router wiring. It also
-ensures static and upload directories exist so deployments fail fast when the
-filesystem layout is incorrect.
+This module owns the public ASGI `app` instance, the router wiring, and the
+lifespan hook that runs the upload ingest pipeline. It also ensures static and
+upload directories exist so deployments fail fast when the filesystem layout is
+incorrect.
 """
 
+import asyncio
+import contextlib
 import logging
 import os
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
+from app.domain.collections import flush_upserts
+from app.domain.ingestion.jobs import start_ingest_pipeline, stop_ingest_pipeline
 from app.routes.api import router as api_router
 from app.routes.pages import router as pages_router
 
 logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="Spellbinder: Chroma Demo")
+
+@contextlib.asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Run the staged upload ingest pipeline for the lifetime of the app and flush queued Chroma writes on exit."""
+    await start_ingest_pipeline()
+    try:
+        yield
+    finally:
+        await stop_ingest_pipeline()
+        await asyncio.to_thread(flush_upserts)
+
+
+app = FastAPI(title="Spellbinder: Chroma Demo", lifespan=lifespan)
 
 
 def create_application() -> FastAPI:
@@ -5,6 +5,7 @@ validated responses for the UI and API consumers. Keep the logic thin and
 delegate to domain modules for data access and processing.
 """
 
+import itertools
 import os
 from typing import Any, Dict, List, Optional
 
@@ -13,7 +14,8 @@ from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
 from app.domain.chunking import detect_chunks
 from app.domain.chunking.orchestrator import detect_or_reuse_chunks, derive_doc_id, slugify
 from app.domain.collections import (
-    client,
+    chunked_upsert,
+    delete_collection,
     get_collection,
     list_collection_names,
     normalize_collection_name,
@@ -22,6 +24,7 @@ from app.domain.collections import (
 )
 from app.domain.chunks import get_chunks, list_docs, store_chunks
 from app.domain.ingestion import ingest_lore_from_text, ingest_text
+from app.domain.ingestion.jobs import IngestJob, discard_ingest_job, get_ingest_job, submit_ingest_job
 from app.domain.library import (
     delete_connection,
     delete_thing,
@@ -30,7 +33,9 @@ from app.domain.library import (
     list_connections,
     list_things,
     upsert_connection,
+    upsert_connections_bulk,
     upsert_thing,
+    upsert_things_bulk,
 )
 from app.schemas import (
     ChunkDetectionRequest,
@@ -48,7 +53,7 @@ from app.schemas import (
     QueryRequest,
     Thing,
 )
-from app.upload_store import describe_upload, extract_text_from_bytes, save_upload
+from app.upload_store import describe_upload, read_upload_text, save_upload
 
 router = APIRouter(prefix="/api", tags=["api"])
 
@@ -123,7 +128,7 @@ def collections_delete(name: str):
     existing = set(list_collection_names())
     if safe_name not in existing:
         raise HTTPException(status_code=404, detail="Collection not found")
-    client().delete_collection(name=safe_name)
+    delete_collection(safe_name)
     return {"ok": True, "deleted": safe_name}
 
 
@@ -142,49 +147,19 @@ def ingest_openai(payload: OpenAIIngestRequest):
     return result
 
 
-@router.post("/ingest/upload")
-async def ingest_upload(
-    collection: str = Form(...),
-    notes: Optional[str] = Form(default=None),
-    files: List[UploadFile] = File(...),
-):
-    """Accept uploaded files, extract text, run ingestion, and summarize results per file."""
-    safe_collection = normalize_collection_name(collection)
-    if not files:
-        raise HTTPException(status_code=400, detail="At least one file is required.")
-
+def _summarize_ingest_job(job: IngestJob) -> Dict[str, Any]:
     totals = {"things": 0, "connections": 0, "chunks": 0}
     all_chunks: List[Dict[str, Any]] = []
     file_results: List[Dict[str, Any]] = []
 
-    for f in files:
-        data = await f.read()
-        upload_meta = save_upload(f, data)
-        text = extract_text_from_bytes(data)
-        size_bytes = len(data) if data is not None else None
-
-        if not text.strip():
-            file_results.append({
-                "file": describe_upload(upload_meta, size_bytes),
-                "error": "File is empty or unreadable",
-            })
-            continue
-
-        try:
-            result = ingest_lore_from_text(
-                text=text,
-                collection=safe_collection,
-                notes=notes,
-                source={
-                    "filename": upload_meta["filename"],
-                    "file_id": upload_meta["file_id"],
-                    "url": upload_meta["url"],
-                },
-            )
-        except Exception as exc:
+    for item in job.items:
+        upload_meta = item.upload
+        size_bytes = upload_meta["size_bytes"]
+        result = item.result
+        if isinstance(result, Exception):
             file_results.append({
                 "file": describe_upload(upload_meta, size_bytes),
-                "error": str(exc),
+                "error": str(result),
             })
             continue
 
@@ -205,13 +180,70 @@ async def ingest_upload(
 
     return {
         "ok": True,
-        "collection": safe_collection,
+        "job_id": job.job_id,
+        "status": "done",
+        "collection": job.collection,
         "totals": totals,
         "files": file_results,
         "chunks": all_chunks,
     }
 
 
+@router.post("/ingest/upload")
+async def ingest_upload(
+    collection: str = Form(...),
+    notes: Optional[str] = Form(default=None),
+    files: List[UploadFile] = File(...),
+    wait: bool = Query(default=True, description="Wait for ingestion to finish instead of returning a job id"),
+):
+    """
+    Accept uploaded files and ingest them through the staged ingest pipeline.
+
+    Files are saved to disk here, then queued for reading, OpenAI extraction
+    (batched with uploads from other requests) and storage. With `wait=true`
+    the per-file summary is returned once every file finishes; otherwise the
+    job id is returned immediately for polling via `/ingest/jobs/{job_id}`.
+    Per-file failures are reported without aborting the batch.
+    """
+    safe_collection = normalize_collection_name(collection)
+    if not files:
+        raise HTTPException(status_code=400, detail="At least one file is required.")
+
+    uploads = [await save_upload(f) for f in files]
+    job = await submit_ingest_job(safe_collection, notes, uploads)
+    if not wait:
+        return {"ok": True, "job_id": job.job_id, "status": "queued", "collection": safe_collection}
+
+    await job.done.wait()
+    # This caller gets the full summary now, so the job need not stay around for polling.
+    discard_ingest_job(job.job_id)
+    return _summarize_ingest_job(job)
+
+
+@router.get("/ingest/jobs/{job_id}")
+def ingest_job_status(job_id: str):
+    """
+    Return progress for a queued upload ingest, or its full per-file summary once finished.
+
+    Jobs are tracked in the memory of the worker process that accepted the
+    upload, so with several workers poll through a sticky route or expect 404
+    from the others. Returns 404 for unknown, evicted, or `wait=true` jobs.
+    """
+    job = get_ingest_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    if not job.done.is_set():
+        return {
+            "ok": True,
+            "job_id": job.job_id,
+            "status": "running",
+            "collection": job.collection,
+            "files_total": len(job.items),
+            "files_done": len(job.items) - job.pending,
+        }
+    return _summarize_ingest_job(job)
+
+
 # ---------------- Things ----------------
 
 @router.post("/things", response_model=Thing)
@@ -301,27 +333,26 @@ def chunks_upsert(name: str, payload: ChunksUpsert):
         thing_type = c.thing_type or getattr(c, "record_type", None)
         thing_id = c.thing_id or getattr(c, "record_id", None)
 
-        md: Dict[str, Any] = {
-            "chunk_kind": chunk_kind,
-            "thing_id": thing_id,
-            "thing_type": thing_type,
-            "edge_id": c.edge_id,
-            "source_file": c.source_file,
-            "source_section": c.source_section,
-            "chapter_number": c.chapter_number,
-            "scene_id": c.scene_id,
-            "pov": c.pov,
-            "location_id": c.location_id,
-            "entity_ids": c.entity_ids,
-            "tags": c.tags,
-        }
-        if c.extra:
-            # keep it flat-ish; nested dicts may work but can make filtering harder
-            md.update({f"extra.{k}": v for k, v in c.extra.items()})
+        fields = (
+            ("chunk_kind", chunk_kind),
+            ("thing_id", thing_id),
+            ("thing_type", thing_type),
+            ("edge_id", c.edge_id),
+            ("source_file", c.source_file),
+            ("source_section", c.source_section),
+            ("chapter_number", c.chapter_number),
+            ("scene_id", c.scene_id),
+            ("pov", c.pov),
+            ("location_id", c.location_id),
+            ("entity_ids", c.entity_ids),
+            ("tags", c.tags),
+        )
+        # keep it flat-ish; nested dicts may work but can make filtering harder
+        extras = ((f"extra.{k}", v) for k, v in c.extra.items()) if c.extra else ()
 
-        metas.append({k: v for k, v in md.items() if v is not None})
+        metas.append({k: v for k, v in itertools.chain(fields, extras) if v is not None})
 
-    col.upsert(ids=ids, documents=docs, metadatas=sanitize_metadatas(metas))
+    chunked_upsert(col, ids, docs, sanitize_metadatas(metas))
     return {"ok": True, "upserted": len(ids), "collection": name}
 
 
@@ -446,8 +477,8 @@ def ingest_api(payload: Dict[str, Any]):
 
     result = ingest_text(text=text, collection=collection, source_file=source_file, source_section=source_section)
 
-    stored_things = [upsert_thing(t) for t in result["things"]]
-    stored_connections = [upsert_connection(c) for c in result["connections"]]
+    stored_things = upsert_things_bulk(result["things"])
+    stored_connections = upsert_connections_bulk(result["connections"])
 
     chunks = result["chunks"]
     if collection and chunks:
@@ -493,10 +524,9 @@ async def chunking_upload(
     primary_doc_id: Optional[str] = None
 
     for f in files:
-        data = await f.read()
-        upload_meta = save_upload(f, data)
-        size_bytes = len(data) if data is not None else None
-        text = extract_text_from_bytes(data)
+        upload_meta = await save_upload(f)
+        size_bytes = upload_meta["size_bytes"]
+        text = read_upload_text(upload_meta)
 
         if not text.strip():
             results.append({
@@ -1,33 +1,58 @@
 """Utilities for persisting uploads and extracting text content."""
 
+import asyncio
+import functools
+import io
+import logging
 import os
-import uuid
-from typing import Dict, Optional
+import shutil
+from typing import Any, BinaryIO, Dict, Optional
 from urllib.parse import quote
 
 from fastapi import UploadFile
 
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover
+    PdfReader = None
+
+logger = logging.getLogger(__name__)
+
 UPLOADS_ROOT = os.getenv("UPLOADS_ROOT", "./uploads")
+UPLOAD_CHUNK_SIZE = 1 << 20
+# Text files essentially never contain NUL bytes; binary formats do early on.
+_BINARY_SNIFF_BYTES = 8192
 
 
+@functools.lru_cache(maxsize=1)
 def _ensure_root() -> str:
-    """Create the upload root directory if needed and return its absolute path."""
+    """Create the upload root directory once per process and return its absolute path."""
     root = os.path.abspath(UPLOADS_ROOT)
     os.makedirs(root, exist_ok=True)
     return root
 
 
-def save_upload(file: UploadFile, data: bytes) -> Dict[str, str]:
-    """Persist an uploaded file to a unique directory and return its metadata."""
+def _copy_to_path(src: BinaryIO, dest_path: str) -> int:
+    with open(dest_path, "wb") as dst:
+        shutil.copyfileobj(src, dst, UPLOAD_CHUNK_SIZE)
+        return dst.tell()
+
+
+async def save_upload(file: UploadFile) -> Dict[str, Any]:
+    """
+    Stream an uploaded file to a unique directory in 1 MiB chunks and return
+    its metadata, including `size_bytes`, without buffering the whole file.
+    The copy runs in one worker thread rather than one thread hop per chunk.
+    """
     root = _ensure_root()
-    file_id = uuid.uuid4().hex
-    safe_name = os.path.basename(file.filename or "upload")
-    dest_dir = os.path.join(root, file_id)
+    file_id = os.urandom(16).hex()
+    safe_name = os.path.basename(file.filename or "") or "upload"
+    # root is already absolute and file_id/safe_name contain no separators.
+    dest_dir = f"{root}{os.sep}{file_id}"
     os.makedirs(dest_dir, exist_ok=True)
 
-    dest_path = os.path.join(dest_dir, safe_name)
-    with open(dest_path, "wb") as f:
-        f.write(data)
+    dest_path = f"{dest_dir}{os.sep}{safe_name}"
+    size_bytes = await asyncio.to_thread(_copy_to_path, file.file, dest_path)
 
     return {
         "file_id": file_id,
@@ -35,15 +60,62 @@ def save_upload(file: UploadFile, data: bytes) -> Dict[str, str]:
         "path": dest_path,
         "url": f"/uploads/{file_id}/{quote(safe_name)}",
         "content_type": file.content_type or "application/octet-stream",
+        "size_bytes": size_bytes,
     }
 
 
-def extract_text_from_bytes(data: bytes) -> str:
-    """Best-effort text extraction from uploaded content."""
+def _extract_pdf(data: bytes) -> str:
+    if PdfReader is None:
+        logger.warning("Upload store: pypdf not installed; skipping PDF text extraction")
+        return ""
     try:
-        return data.decode("utf-8")
+        reader = PdfReader(io.BytesIO(data))
+        return "\n\n".join(page.extract_text() or "" for page in reader.pages)
     except Exception:
-        return data.decode("utf-8", errors="ignore")
+        logger.exception("Upload store: failed to extract text from PDF")
+        return ""
+
+
+def extract_text_from_bytes(data: bytes) -> str:
+    """
+    Best-effort text extraction from uploaded content.
+
+    PDFs are recognized by their header and handed to pypdf when it is
+    installed (otherwise no text is returned). Other binary payloads (a NUL
+    byte near the start) yield no text. Everything else is decoded as UTF-8
+    in a single pass, dropping invalid bytes.
+    """
+    if data[:5] == b"%PDF-":
+        return _extract_pdf(data)
+    if b"\x00" in data[:_BINARY_SNIFF_BYTES]:
+        logger.info("Upload store: payload looks binary (%d bytes); no text extracted", len(data))
+        return ""
+    # Valid UTF-8 decodes identically with or without the error handler, so a
+    # strict attempt followed by a lenient retry would only repeat the work.
+    return data.decode("utf-8", errors="ignore")
+
+
+def _drop_page_cache(fd: int) -> None:
+    """Ask the kernel to evict a file's cached pages; a no-op where unsupported."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+
+
+def read_upload_text(record: Dict[str, Any]) -> str:
+    """
+    Read a saved upload back from disk and extract its text.
+
+    This is the app's last read of the file, so its pages are dropped from the
+    page cache afterwards to avoid crowding out Chroma's memory-mapped data.
+    """
+    with open(record["path"], "rb") as f:
+        data = f.read()
+        _drop_page_cache(f.fileno())
+    return extract_text_from_bytes(data)
 
 
 def describe_upload(record: Dict[str, str], size_bytes: Optional[int]) -> Dict[str, str]:
@@ -14,22 +14,18 @@ ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.domain.collections import client, get_collection
-from app.domain.library import upsert_connection, upsert_thing
+from app.domain.collections import chunked_upsert, client, delete_collection, get_collection
+from app.domain.library import upsert_connections_bulk, upsert_things_bulk
 from app.schemas import Connection, Thing
 
 
 def normalize_metadata(md: dict) -> dict:
     """Chroma versions can reject list metadata; convert lists to comma strings."""
-    normalized: dict = {}
-    for key, val in md.items():
-        if val is None:
-            continue
-        if isinstance(val, list):
-            normalized[key] = ", ".join(str(v) for v in val)
-        else:
-            normalized[key] = val
-    return normalized
+    return {
+        key: ", ".join(map(str, val)) if isinstance(val, list) else val
+        for key, val in md.items()
+        if val is not None
+    }
 
 
 def seed_library() -> None:
@@ -61,10 +57,11 @@ def seed_library() -> None:
         ),
     ]
 
-    for thing in things:
-        upsert_thing(thing)
+    # library.json is rewritten on every save, so write each kind in one load/save
+    # rather than per item (concurrent per-item writers would drop updates).
+    upsert_things_bulk(things)
 
-    upsert_connection(
+    upsert_connections_bulk([
         Connection(
             edge_id="edge.sahla.kaar.origin",
             src_id="character.sahla",
@@ -75,16 +72,16 @@ def seed_library() -> None:
             created_at=datetime.now(timezone.utc),
             updated_at=datetime.now(timezone.utc),
         )
-    )
+    ])
 
 
 def seed_collection(name: str) -> None:
-    # reset collection for a clean demo
+    # reset collection for a clean demo; an existing empty one is reused as-is
     existing = {c.name for c in client().list_collections()}
-    if name in existing:
-        client().delete_collection(name)
-
     col = get_collection(name)
+    if name in existing and col.count() > 0:
+        delete_collection(name)
+        col = get_collection(name)
 
     texts = [
         "Sahla charts passage by reading tide-music that only she can hear.",
@@ -111,7 +108,7 @@ def seed_collection(name: str) -> None:
     ]
 
     metadatas = [normalize_metadata(md) for md in raw_metadatas]
-    col.upsert(ids=ids, documents=texts, metadatas=metadatas)
+    chunked_upsert(col, ids, texts, metadatas)
 
 
 def main() -> None:
@@ -3,13 +3,23 @@ Use OpenAI to extract lore elements from a document and upsert them into the dem
 
 Example:
   python scripts/openai_ingest.py --file sample.txt --collection demo_lore
+
+Bulk jobs can go through the OpenAI Batch API instead (cheaper, completes within 24h):
+  python scripts/openai_ingest.py --file sample.txt --collection demo_lore --batch
+  python scripts/openai_ingest.py --poll <batch_id>
 """
 
 import argparse
 import json
 from pathlib import Path
 
-from app.domain.ingestion import ingest_lore_from_text
+from app.domain.collections import flush_upserts
+from app.domain.ingestion import ingest_lore_from_text, poll_and_finalize, submit_batch_ingest
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 
 def load_text(path: Path, inline_text: str | None) -> str:
@@ -20,24 +30,54 @@ def load_text(path: Path, inline_text: str | None) -> str:
     return path.read_text(encoding="utf-8")
 
 
+def print_json(data: dict) -> None:
+    if orjson is not None:
+        print(orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8"))
+    else:
+        print(json.dumps(data, indent=2, default=str))
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Extract lore data using OpenAI and upsert into the stores.")
     parser.add_argument("--file", type=Path, help="Path to a document file")
     parser.add_argument("--text", type=str, help="Inline document text")
     parser.add_argument("--collection", default="demo_lore", help="Chroma collection name to upsert chunks into")
+    parser.add_argument("--batch", action="store_true", help="Submit through the OpenAI Batch API and print the batch ID")
+    parser.add_argument("--poll", metavar="BATCH_ID", help="Check a submitted batch and store its results once finished")
     args = parser.parse_args()
 
+    if args.poll:
+        try:
+            result = poll_and_finalize(args.poll)
+        except KeyError as exc:
+            raise SystemExit(str(exc)) from exc
+        flush_upserts()
+        results = result.pop("results") or {}
+        result["documents"] = {
+            custom_id: doc.get("counts", doc) for custom_id, doc in results.items()
+        }
+        print_json(result)
+        return
+
     doc_text = load_text(args.file, args.text) if (args.file or args.text) else ""
     if not doc_text.strip():
         raise SystemExit("Provide --file or --text with content.")
 
+    if args.batch:
+        batch_id = submit_batch_ingest([{"text": doc_text, "collection": args.collection}])
+        print(f"Submitted batch {batch_id}; run with --poll {batch_id} to store the results.")
+        return
+
     extracted = ingest_lore_from_text(doc_text, args.collection)
+    # Chroma writes happen on a background thread; wait for them before exiting.
+    flush_upserts()
     print("Extraction complete.")
-    print(json.dumps({
+    summary = {
         "things_added": extracted["counts"]["things"],
         "connections_added": extracted["counts"]["connections"],
         "chunks_added": extracted["counts"]["chunks"],
-    }, indent=2))
+    }
+    print_json(summary)
 
 
 if __name__ == "__main__":